@@ -2,12 +2,29 @@ import streamlit as st
 import polars as pl
 import numpy as np
 import duckdb
-import plotly.express as px
+import plotly.graph_objects as go
 
 from datetime import date
 
 #NOTE PLEASE ENSURE NOTEBOOK IS RAN BEFORE THE STREAMLIT APP
 
+#Chart labels for the hours (12am-11pm) and the days of the week (Monday first), these only need to be made once
+HOUR_LABELS = tuple(f"{h%12 or 12}{'am' if h<12 else 'pm'}" for h in range(24))
+WEEKDAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+#A map for the payment options, the payment types in the data are fixed so the filter options come from here
+PAYMENT_MAP = {
+    1: "Credit card",
+    2: "Cash",
+    3: "No charge",
+    4: "Dispute",
+    0: "Other"
+}
+PAYMENT_LABELS = tuple(PAYMENT_MAP.values())
+
+#Needed to convert back to code for filtering
+LABEL_TO_CODE = {v: k for k, v in PAYMENT_MAP.items()}
+
 
 #Configure the settings for the page
 st.set_page_config(
@@ -31,14 +48,33 @@ st.markdown("""
 """)
 
 #Below is the load function that used streamlit's cache_data decorator
-@st.cache_data
-def load_data():
+#All the loading, cleaning and feature engineering happens inside it so it only runs once and not on every rerun of the app
+#The cleaned data is also saved to disk so a restart of the app doesn't download and clean the parquet file again
+@st.cache_data(persist="disk", show_spinner="Loading taxi data...")
+def load_and_clean():
     yellow_taxi_url = "https://d37ci6vzurychx.cloudfront.net/trip-data/yellow_tripdata_2024-01.parquet"
     taxi_zone_url = "https://d37ci6vzurychx.cloudfront.net/misc/taxi_zone_lookup.csv"
 
+    #These are the only columns the dashboard uses, so only these are read from the parquet file
+    used_columns = [
+        "tpep_pickup_datetime",
+        "tpep_dropoff_datetime",
+        "PULocationID",
+        "DOLocationID",
+        "payment_type",
+        "fare_amount",
+        "total_amount",
+        "trip_distance"
+    ]
+
     try:
         
-        taxi_trip_df = pl.read_parquet(yellow_taxi_url)
+        #The file is read in chunks by polars' streaming engine so the whole file is never held in memory at once
+        taxi_trip_df = (
+            pl.scan_parquet(yellow_taxi_url, low_memory=True)
+            .select(used_columns)
+            .collect(streaming=True)
+        )
     except FileNotFoundError:
         st.error("Can't find the cleaned data, please run the notebook first to get cleaned data")
         st.stop()
@@ -57,6 +93,7 @@ def load_data():
     #------------------------------
 
     #We will now sanitize the data for preparation for analysis
+    #All the cleaning and feature engineering steps are chained on a lazy frame so polars can run them as one query
 
     #First we clean up any rows with null values in important columns such as pick and dropoff times, locations, fares and trips
 
@@ -69,54 +106,226 @@ def load_data():
         "trip_distance"
     ]
 
-    taxi_trip_df = taxi_trip_df.drop_nulls(subset=important_columns)
-
-    #We now clean the data by removing any rows where the trip has zero or negative distance, negative fares, or fares exceeding $500
+    #The zone table is small and never changes so we look up the pickup zone names once here instead of joining on every query
+    zone_map = dict(zip(taxi_zone_df['LocationID'], taxi_zone_df['Zone']))
 
-    taxi_trip_df = taxi_trip_df.filter(
-        pl.col("trip_distance") > 0,
-        pl.col("fare_amount") >= 0,
-        pl.col("fare_amount") <= 500
+    #Trip duration in minutes, used for both the duration and speed columns
+    trip_duration_minutes = (
+        (pl.col("tpep_dropoff_datetime") - pl.col("tpep_pickup_datetime"))
+        .dt.total_seconds() / 60
     )
 
-    #For our last bit of sanitization we then remove rows where dropoff time is before pickup time
+    taxi_trip_df = (
+        taxi_trip_df
+        .lazy()
+        .drop_nulls(subset=important_columns)
+
+        #We now clean the data by removing any rows where the trip has zero or negative distance, negative fares, or fares exceeding $500
+        #For our last bit of sanitization we then remove rows where dropoff time is before pickup time
+        .filter(
+            (pl.col("trip_distance") > 0) &
+            (pl.col("fare_amount") >= 0) &
+            (pl.col("fare_amount") <= 500) &
+            (pl.col("tpep_dropoff_datetime") >= pl.col("tpep_pickup_datetime"))
+        )
+
+        #Next we do feature engineering to add our own derived columns to the dataset
+        #All the derived columns are added in one pass, with the trip duration expression reused for the speed
+        .with_columns([
+            #Adding trip duration in minutes
+            trip_duration_minutes.alias("trip_duration_minutes"),
+
+            #Adding trip speed in mph
+            pl.when(trip_duration_minutes > 0)
+            .then(pl.col("trip_distance") / (trip_duration_minutes / 60))
+            .otherwise(None)
+            .alias("trip_speed_mph"),
 
-    taxi_trip_df = taxi_trip_df.filter(
-        pl.col("tpep_dropoff_datetime") >= pl.col("tpep_pickup_datetime")
+            #Adding pickup date, used by the date range filter
+            pl.col('tpep_pickup_datetime').cast(pl.Date).alias('pickup_date'),
+
+            #Adding pickup hour
+            pl.col('tpep_pickup_datetime').dt.hour().cast(pl.UInt8).alias('pickup_hour'),
+
+            #Adding pickup day of week (1 = Monday to 7 = Sunday), the day names are only added when plotting
+            pl.col('tpep_pickup_datetime').dt.weekday().alias('pickup_dow'),
+
+            #Narrowing the low cardinality ID columns (payment types are 0-6, location IDs are at most 265)
+            pl.col('payment_type').cast(pl.UInt8),
+            pl.col('PULocationID').cast(pl.UInt16),
+            pl.col('DOLocationID').cast(pl.UInt16),
+
+            #Adding the pickup zone name
+            pl.col('PULocationID').replace(zone_map, default='Unknown').alias('pickup_zone')
+        ])
+        .collect(streaming=True)
     )
 
+    return taxi_trip_df
 
-    #Next we do feature engineering to add our own derived columns to the dataset
+#We then load the cleaned taxi trip data (with the pickup zone names already added) into a polars dataframe
+taxi_trip_df = load_and_clean()
 
-    #Adding trip duration in minutes
-    taxi_trip_df = taxi_trip_df.with_columns([
-        ((pl.col("tpep_dropoff_datetime") - pl.col("tpep_pickup_datetime"))
-        .dt.total_seconds() / 60)
-        .alias("trip_duration_minutes")
-    ])
+# -----------------------------
+# Below are the cached filtering and query functions
+# -----------------------------
 
-    #Adding trip speed in mph
-    taxi_trip_df = taxi_trip_df.with_columns([
-        pl.when(pl.col("trip_duration_minutes") > 0)
-        .then(pl.col("trip_distance") / (pl.col("trip_duration_minutes") / 60))
-        .otherwise(None)
-        .alias("trip_speed_mph")
-    ])
+#The interactive filters used in the WHERE clause of every query, the values are bound as query parameters
+TRIP_FILTERS = (
+    "pickup_date BETWEEN $start_date AND $end_date "
+    "AND pickup_hour BETWEEN $start_hour AND $end_hour "
+    "AND list_contains($payment_codes, payment_type)"
+)
 
-    #Adding pickup hour
-    taxi_trip_df = taxi_trip_df.with_columns([
-        pl.col('tpep_pickup_datetime').dt.hour().alias('pickup_hour')
-    ])
+#A single DuckDB connection is kept for the whole app with the unfiltered trips loaded into it once
+@st.cache_resource
+def get_connection():
+    con = duckdb.connect()
+    con.from_arrow(taxi_trip_df.to_arrow()).create("taxi_trips_all")
+    return con
+
+#Runs a SQL query with DuckDB on the trips with the filter values as parameters
+#Each query uses its own cursor since streamlit sessions can run at the same time
+#The result is returned as a pandas dataframe, or as a dict of numpy arrays when as_numpy is set
+def query_trips(query, start_date, end_date, hour_range, payment_codes, as_numpy=False):
+    with get_connection().cursor() as cursor:
+        result = cursor.execute(query, {
+            "start_date": start_date,
+            "end_date": end_date,
+            "start_hour": hour_range[0],
+            "end_hour": hour_range[1],
+            "payment_codes": list(payment_codes)
+        })
+        return result.fetchnumpy() if as_numpy else result.fetchdf()
+
+#The filters are passed in as arguments so streamlit caches a result for each combination of filters
+@st.cache_data
+def get_key_metrics(start_date, end_date, hour_range, payment_codes):
+    #All five key metrics are calculated in a single pass over the filtered trips
+    key_metrics = query_trips(f'''
+        SELECT 
+            COUNT(*) AS total_trips,
+            AVG(fare_amount) AS avg_fare,
+            SUM(total_amount) AS total_revenue,
+            AVG(trip_distance) AS avg_trip_distance,
+            AVG(trip_duration_minutes) AS avg_duration
+        FROM
+            taxi_trips_all
+        WHERE
+            {TRIP_FILTERS}
+    ''', start_date, end_date, hour_range, payment_codes).iloc[0]
+
+    return (
+        int(key_metrics["total_trips"]),
+        key_metrics["avg_fare"],
+        key_metrics["total_revenue"],
+        key_metrics["avg_trip_distance"],
+        key_metrics["avg_duration"]
+    )
 
-    #Adding pickup day of week
-    taxi_trip_df = taxi_trip_df.with_columns([
-        pl.col('tpep_pickup_datetime').dt.strftime("%A").alias('pickup_day_of_week')
-    ])
+@st.cache_data
+def get_busiest_pickup_zones(start_date, end_date, hour_range, payment_codes):
+    #SQL query from notebook for finding busiest pickup zones
+    return query_trips(f'''
+        SELECT 
+            pickup_zone,
+            COUNT(*) AS total_trips
+        FROM
+            taxi_trips_all
+        WHERE
+            {TRIP_FILTERS}
+        GROUP BY 
+            pickup_zone
+        ORDER BY 
+            total_trips DESC
+        LIMIT 10
+    ''', start_date, end_date, hour_range, payment_codes)
 
-    return taxi_trip_df, taxi_zone_df
+@st.cache_data
+def get_average_fare_by_hour(start_date, end_date, hour_range, payment_codes):
+    return query_trips(f''' 
+        SELECT 
+            pickup_hour,
+            ROUND(AVG(fare_amount), 2) as avg_fare_amount
+        FROM
+            taxi_trips_all
+        WHERE
+            {TRIP_FILTERS}
+        GROUP BY 
+            pickup_hour
+        ORDER BY 
+            pickup_hour
+    ''', start_date, end_date, hour_range, payment_codes)
 
-#We then load the cleaned taxi trip data into a polars dataframe along with the base zone data
-taxi_trip_df, taxi_zone_df = load_data()
+@st.cache_data
+def get_trip_distance_bins(start_date, end_date, hour_range, payment_codes):
+    #Counts the trips under 50 miles in 0.5 mile bins, along with the median and max distance, so only the bins are sent to the chart
+    return query_trips(f'''
+        WITH trip_distances AS (
+            SELECT 
+                trip_distance
+            FROM
+                taxi_trips_all
+            WHERE 
+                {TRIP_FILTERS}
+                AND trip_distance < 50
+        )
+        SELECT 
+            FLOOR(trip_distance * 2) / 2 AS distance_bin,
+            COUNT(*) AS trip_count,
+            (SELECT MEDIAN(trip_distance) FROM trip_distances) AS median_distance,
+            (SELECT MAX(trip_distance) FROM trip_distances) AS max_distance
+        FROM
+            trip_distances
+        GROUP BY 
+            distance_bin
+        ORDER BY 
+            distance_bin
+    ''', start_date, end_date, hour_range, payment_codes)
+
+@st.cache_data
+def get_payment_type_percentages(start_date, end_date, hour_range, payment_codes):
+    return query_trips(f''' 
+        SELECT 
+            payment_type,        
+            CASE payment_type
+                WHEN 1 THEN 'Credit card'
+                WHEN 2 THEN 'Cash'
+                WHEN 3 THEN 'No charge'
+                WHEN 4 THEN 'Dispute'
+                WHEN 5 THEN 'Unknown'
+                ELSE 'Other'
+            END AS payment_method,
+            ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER (), 2) AS percentage_of_trips
+        FROM
+            taxi_trips_all
+        WHERE
+            {TRIP_FILTERS}
+        GROUP BY 
+            payment_type
+        ORDER BY
+            payment_type                    
+    ''', start_date, end_date, hour_range, payment_codes)
+
+@st.cache_data
+def get_trips_by_day_and_hour(start_date, end_date, hour_range, payment_codes):
+    #Counts the trips for each day and hour then fills a 7x24 matrix (days Monday to Sunday as rows and hours as columns)
+    trip_counts = query_trips(f'''
+        SELECT 
+            pickup_dow - 1 AS day_index,
+            pickup_hour,
+            COUNT(*)::INT AS trip_count
+        FROM
+            taxi_trips_all
+        WHERE
+            {TRIP_FILTERS}
+        GROUP BY 
+            day_index, pickup_hour
+    ''', start_date, end_date, hour_range, payment_codes, as_numpy=True)
+
+    heatmap_matrix = np.zeros((7, 24), dtype=np.int32)
+    heatmap_matrix[trip_counts["day_index"], trip_counts["pickup_hour"]] = trip_counts["trip_count"]
+    return heatmap_matrix
 
 # -----------------------------
 # Below we set up the interactive filters
@@ -143,52 +352,32 @@ hour_range = st.sidebar.slider(
 )
 
 # Payment type multiselect
-
-#A map for the payment options
-payment_type_map = {
-    1: "Credit card",
-    2: "Cash",
-    3: "No charge",
-    4: "Dispute",
-    0: "Other"
-}
-
-payment_type_codes = sorted(taxi_trip_df["payment_type"].unique().to_list())
-
-payment_type_labels = [payment_type_map.get(code, "Unkown") 
-                       for code in payment_type_codes]
-
-
 payment_type_filter = st.sidebar.multiselect(
     "Select Payment Types",
-    options=payment_type_labels,
-    default=payment_type_labels
+    options=PAYMENT_LABELS,
+    default=PAYMENT_LABELS
 )
 
-#Needed to convert back to code for filtering
-label_to_code = {v: k for k, v in payment_type_map.items()}
-
-selected_payment_codes = [label_to_code[label] for label in payment_type_filter]
+selected_payment_codes = [LABEL_TO_CODE[label] for label in payment_type_filter]
 
 #Check if a payment type is selected
 if len(selected_payment_codes) == 0:
     st.warning("No data to display. Please select at least one payment type.")
-    filtered_trips = taxi_trip_df.head(0) 
+    total_trips = 0
 #Check if date_range is valid
 elif not isinstance(date_range, tuple) or len(date_range) != 2:
     st.warning("Please select a start and end date for the date range.")
-    filtered_trips = taxi_trip_df.head(0) 
+    total_trips = 0
 else:
     start_date, end_date = date_range
-    #Applying interactive filters
-    filtered_trips = taxi_trip_df.filter(
-        (pl.col("tpep_pickup_datetime").dt.date().is_between(start_date, end_date)) &
-        (pl.col("pickup_hour").is_between(hour_range[0], hour_range[1])) &
-        (pl.col("payment_type").is_in(selected_payment_codes))
-    )
+    #Applying interactive filters, these are passed to every query
+    filters = (start_date, end_date, tuple(hour_range), tuple(selected_payment_codes))
+
+    #The trip count from the key metrics is also used to check the filters
+    total_trips, avg_fare, total_revenue, avg_trip_distace, avg_duration = get_key_metrics(*filters)
 
 #Check if the filter is valid
-if filtered_trips.height == 0:
+if total_trips == 0:
     st.info("No trips match the selected filters.")
 else:
     #Execute the rest of the app
@@ -197,13 +386,6 @@ else:
     st.subheader("Key Metrics")
         
 
-    #Get the data from the cleaned taxi trip data frame
-    total_trips = filtered_trips.height
-    avg_fare = filtered_trips.get_column("fare_amount").mean()
-    total_revenue = filtered_trips.get_column("total_amount").sum()
-    avg_trip_distace = filtered_trips.get_column("trip_distance").mean()
-    avg_duration = filtered_trips.get_column("trip_duration_minutes").mean()
-
     #Set the columns up for the metrics
     col1, col2, col3, col4, col5 = st.columns(5)
 
@@ -228,58 +410,32 @@ else:
         ]
     )
 
-    #Setting up DuckDb to do our SQL queries for the visuals
-
-    # Create a DuckDB connection
-    con = duckdb.connect()
-
-    #Register dataframes
-    con.register("taxi_trips", filtered_trips)
-    con.register("taxi_zones", taxi_zone_df)
-
-
     # -----------------------------
     # Top 10 Pickup Zones
     # -----------------------------
 
     with tab1:
-        #SQL query from notebook for finding busiest pickup zones
-        busiest_pickup_zones = con.execute('''
-            SELECT 
-                z."Zone" AS pickup_zone,
-                COUNT(*) AS total_trips
-            FROM
-                taxi_trips t
-            JOIN
-                taxi_zones z 
-                    ON t.PULocationID = z.LocationID
-            GROUP BY 
-                z."Zone"
-            ORDER BY 
-                total_trips DESC
-            LIMIT 10
-                                        
-        '''
-        ).fetchdf()
+        busiest_pickup_zones = get_busiest_pickup_zones(*filters)
 
         #Chart configs
-        pickup_zone_bar_chart = px.bar(
-            busiest_pickup_zones,
-            x="total_trips",
-            y="pickup_zone",
+        pickup_zone_bar_chart = go.Figure(go.Bar(
+            x=busiest_pickup_zones["total_trips"].to_numpy(),
+            y=busiest_pickup_zones["pickup_zone"].to_numpy(),
             orientation='h', 
-            title="Top 10 Pickup Zones by Trip Count",
-            color= "total_trips",
-            color_continuous_scale='Plasma',
-            labels={
-                "pickup_zone" : "Pickup Zone",
-                "total_trips" : "Total Trips"
-            }
-        )
+            marker=dict(
+                color=busiest_pickup_zones["total_trips"].to_numpy(),
+                colorscale='Plasma',
+                showscale=True,
+                colorbar=dict(title="Total Trips")
+            ),
+            hovertemplate="Pickup Zone=%{y}<br>Total Trips=%{x}<extra></extra>"
+        ))
 
         pickup_zone_bar_chart.update_layout(
+            title="Top 10 Pickup Zones by Trip Count",
+            xaxis_title="Total Trips",
             height=600, 
-            yaxis={'categoryorder': 'total ascending'}, 
+            yaxis={'categoryorder': 'total ascending', 'title': "Pickup Zone"}, 
             title_x=0.5,  
             title_font_size=16,
         )
@@ -295,45 +451,31 @@ else:
     # -----------------------------
 
     with tab2:
-        #SQL query
-        average_fair = con.execute(''' 
-            SELECT 
-                pickup_hour,
-                ROUND(AVG(fare_amount), 2) as avg_fare_amount
-            FROM
-                taxi_trips
-            GROUP BY 
-            pickup_hour
-            ORDER BY 
-                pickup_hour
-        ''').fetchdf()
+        average_fair = get_average_fare_by_hour(*filters)
 
         #Chart configs
-        avg_fare_line_chart = px.line(
-            average_fair,
-            x = "pickup_hour",
-            y = "avg_fare_amount",
-            title="Average Fare by Hour of Day",
-            markers=True,
-            labels={
-                "pickup_hour": "Hour of Day",
-                "avg_fare_amount": "Average Fare"
-            },
-            line_shape='spline'
-        )
+        #Drawn with WebGL (scattergl) so the chart stays responsive with more points, this doesn't support spline lines
+        avg_fare_line_chart = go.Figure(go.Scattergl(
+            x=average_fair["pickup_hour"].to_numpy(),
+            y=average_fair["avg_fare_amount"].to_numpy(),
+            mode='lines+markers',
+            name="Average Fare"
+        ))
 
 
         avg_fare_line_chart.update_layout(
+            title="Average Fare by Hour of Day",
+            xaxis_title="Hour of Day",
+            yaxis_title="Average Fare",
             height=600, 
             title_x=0.5,  
             title_font_size=18,
             hovermode='x unified'
         )
 
-        hour_labels = {h: f"{h%12 or 12}{'am' if h<12 else 'pm'}" for h in range(24)}
         avg_fare_line_chart.update_xaxes(
             tickvals=list(range(24)),
-            ticktext=[hour_labels[h] for h in range(24)],
+            ticktext=list(HOUR_LABELS),
             tickangle=45,
             range=[-0.5, 23.5] 
         )
@@ -355,22 +497,21 @@ else:
     # ----------------------------- 
 
     with tab3:
-        # Polars data filtering
-        filtered_distances = filtered_trips.filter(pl.col("trip_distance") < 50)
-        median_distance = filtered_distances.get_column("trip_distance").median()
+        # The trip distances are already binned by DuckDB
+        trip_distance_bins = get_trip_distance_bins(*filters)
+        median_distance = trip_distance_bins["median_distance"].iloc[0]
+        max_distance = trip_distance_bins["max_distance"].iloc[0]
 
         # Chart Config  
-        trip_dist_histogram = px.histogram(
-            filtered_distances,
-            x="trip_distance",
-            nbins= 100,
-            title="Distribution of Trip Distances",
+        trip_dist_histogram = go.Figure(go.Bar(
+            x=trip_distance_bins["distance_bin"].to_numpy(),
+            y=trip_distance_bins["trip_count"].to_numpy(),
             opacity=0.7,
-            color_discrete_sequence=['steelblue'],
-        )
+            marker_color='steelblue',
+        ))
 
         trip_dist_histogram.update_xaxes(
-            range=[0, filtered_distances['trip_distance'].max()],  
+            range=[0, max_distance],  
             title="Trip Distance (miles)",
             dtick=5,
             tickformat=".1f",
@@ -381,6 +522,7 @@ else:
         )
 
         trip_dist_histogram.update_layout(
+            title="Distribution of Trip Distances",
             height=600,
             title_x=0.5,  
             title_font_size=18,
@@ -410,7 +552,10 @@ else:
             hovertemplate="<b>Trip Distance</b>: %{x:.1f} miles<br>" +
                         "<b>Count</b>: %{y:,} trips<br>",
             marker_line_color='white',
-            marker_line_width=0.5
+            marker_line_width=0.5,
+            # Each bar starts at its bin and covers the 0.5 mile bin width
+            offset=0,
+            width=0.5
         )
 
 
@@ -426,45 +571,27 @@ else:
     # -----------------------------
 
     with tab4:
-        #SQL query 
-        payment_type_perc = con.execute(''' 
-            SELECT 
-                payment_type,        
-                CASE payment_type
-                    WHEN 1 THEN 'Credit card'
-                    WHEN 2 THEN 'Cash'
-                    WHEN 3 THEN 'No charge'
-                    WHEN 4 THEN 'Dispute'
-                    WHEN 5 THEN 'Unknown'
-                    ELSE 'Other'
-                END AS payment_method,
-                ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER (), 2) AS percentage_of_trips
-            FROM
-                taxi_trips
-            GROUP BY 
-                payment_type
-            ORDER BY
-                payment_type                    
-        ''').fetchdf()
+        payment_type_perc = get_payment_type_percentages(*filters)
 
         #Chart Config
-        payment_type_bar_chart = px.bar(
-            payment_type_perc,
-            x = "percentage_of_trips",
-            y = "payment_method",
+        payment_type_bar_chart = go.Figure(go.Bar(
+            x=payment_type_perc["percentage_of_trips"].to_numpy(),
+            y=payment_type_perc["payment_method"].to_numpy(),
             orientation='h', 
-            title="Payment Type Breakdown",
-            color= "percentage_of_trips",
-            color_continuous_scale='Viridis',
-            labels={
-                "payment_method" : "Payment Method",
-                "percentage_of_trips" : "Percentage of Trips"
-            },
-        )
+            marker=dict(
+                color=payment_type_perc["percentage_of_trips"].to_numpy(),
+                colorscale='Viridis',
+                showscale=True,
+                colorbar=dict(title="Percentage of Trips")
+            ),
+            hovertemplate="Payment Method=%{y}<br>Percentage of Trips=%{x}<extra></extra>"
+        ))
 
         payment_type_bar_chart.update_layout(
+            title="Payment Type Breakdown",
+            xaxis_title="Percentage of Trips",
             height=600, 
-            yaxis={'categoryorder': 'total ascending'}, 
+            yaxis={'categoryorder': 'total ascending', 'title': "Payment Method"}, 
             title_x=0.5,  
             title_font_size=16,
         )
@@ -484,41 +611,39 @@ else:
     # -----------------------------
 
     with tab5:
-        # Create pivot table for heatmap
-        # We convert it to a pandas df then group by the two required columns then counts the trips and coverts to wide format
-        heatmap_data = (
-        filtered_trips
-        .to_pandas()
-        .groupby(['pickup_day_of_week', 'pickup_hour'])
-        .size()
-        .unstack(fill_value=0)
-        )
-
-        # Rename weekdays for clarity
-        weekday_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        heatmap_data = heatmap_data.reindex(weekday_names)
-
-        def hour_to_ampm(hour):
-            return f"{hour%12 or 12}{'am' if hour < 12 else 'pm'}"
-        
-        hour_cols = list(heatmap_data.columns)
-        hour_labels = [hour_to_ampm(hour) for hour in hour_cols]
+        # Create the day by hour matrix for the heatmap, only keeping the hours in the selected range
+        start_hour, end_hour = hour_range
+        heatmap_data = get_trips_by_day_and_hour(*filters)[:, start_hour:end_hour + 1]
+        hour_labels = list(HOUR_LABELS[start_hour:end_hour + 1])
 
         #Chart Config
-        day_hour_heatmap = px.imshow(
-            heatmap_data,
-            labels=dict(x='Hour of Day', y='Day of Week', color='Trip Count'),
+        day_hour_heatmap = go.Figure(go.Heatmap(
+            z=heatmap_data,
             x=hour_labels,
-            y=weekday_names,
-            color_continuous_scale='YlOrRd',
-            title='Taxi Trip Volume: Hour of Day vs Day of Week'
+            y=list(WEEKDAY_NAMES),
+            colorscale='YlOrRd',
+            colorbar=dict(title='Trip Count'),
+            hovertemplate="Hour of Day=%{x}<br>Day of Week=%{y}<br>Trip Count=%{z}<extra></extra>"
+        ))
+
+        day_hour_heatmap.update_layout(
+            title='Taxi Trip Volume: Hour of Day vs Day of Week',
+            height=500, 
+            title_x=0.5
         )
 
-        day_hour_heatmap.update_layout(height=500, title_x=0.5)
-
+        # Keep the heatmap cells square
         day_hour_heatmap.update_xaxes(
+            title='Hour of Day',
             tickangle=45,
-            range=[-0.5, 23.5] 
+            range=[-0.5, 23.5],
+            scaleanchor='y'
+        )
+
+        # Keep Monday at the top of the heatmap
+        day_hour_heatmap.update_yaxes(
+            title='Day of Week',
+            autorange='reversed'
         )
 
         st.plotly_chart(day_hour_heatmap, use_container_width=True)